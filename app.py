@@ -1,38 +1,102 @@
-from flask import Flask, render_template, jsonify, send_from_directory, request
+from flask import Flask, Response, abort, render_template, request, send_file
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
 import json
+import math
 import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# Optional fast serializer; pip install orjson
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
 
+def _json(payload, status=200):
+    if HAS_ORJSON:
+        try:
+            return Response(orjson.dumps(payload), status=status, mimetype="application/json")
+        except orjson.JSONEncodeError:
+            pass  # e.g. ints beyond 64 bits, which the stdlib handles fine
+    return Response(json.dumps(payload), status=status, mimetype="application/json")
+
+# schedule.json is cached in memory and only re-read when its mtime changes;
+# the dict is swapped wholesale so concurrent readers never see a torn entry
+SCHEDULE_PATH = os.path.join(app.static_folder, "schedule.json")
+_SCHED_CACHE = {"mtime": -1, "bytes": b"", "etag": ""}
+
+def _schedule_cache():
+    global _SCHED_CACHE
+    mtime = os.stat(SCHEDULE_PATH).st_mtime_ns
+    if mtime != _SCHED_CACHE["mtime"]:
+        with open(SCHEDULE_PATH, "rb") as fh:
+            body = fh.read()
+        _SCHED_CACHE = {"mtime": mtime, "bytes": body, "etag": hashlib.md5(body).hexdigest()}
+    return _SCHED_CACHE
+
 # ---------- Helpers (CPM) ----------
+# Kahn's algorithm over integer task indices. Returns the order as indices into
+# `tasks` plus successor adjacency in CSR form: the successors of task i are
+# out_indices[out_indptr[i]:out_indptr[i + 1]].
 def topological_order(tasks):
-    name_to_task = {t["activityName"]: t for t in tasks}
-    indeg = {t["activityName"]: 0 for t in tasks}
-    graph = {t["activityName"]: [] for t in tasks}
+    n = len(tasks)
+    name_to_idx = {}
+    for i, t in enumerate(tasks):
+        if t["activityName"] in name_to_idx:
+            raise ValueError(f"Duplicate activity name '{t['activityName']}'.")
+        name_to_idx[t["activityName"]] = i
 
-    for t in tasks:
+    # pass 1: validate and count out-degree / in-degree
+    out_indptr = [0] * (n + 1)
+    indeg = [0] * n
+    for i, t in enumerate(tasks):
         preds = t.get("immediatePredecessor", []) or []
         for p in preds:
-            if p not in name_to_task:
+            if p not in name_to_idx:
                 raise ValueError(f"Predecessor '{p}' referenced by '{t['activityName']}' does not exist.")
-            indeg[t["activityName"]] += 1
-            graph[p].append(t["activityName"])
-
-    # Kahn
-    queue = [n for n, d in indeg.items() if d == 0]
-    order = []
-    while queue:
-        n = queue.pop(0)
-        order.append(n)
-        for m in graph[n]:
+            out_indptr[name_to_idx[p] + 1] += 1
+            indeg[i] += 1
+    for i in range(n):
+        out_indptr[i + 1] += out_indptr[i]
+
+    # pass 2: fill successor indices
+    out_indices = [0] * out_indptr[n]
+    cursor = out_indptr[:n]
+    for i, t in enumerate(tasks):
+        for p in t.get("immediatePredecessor", []) or []:
+            u = name_to_idx[p]
+            out_indices[cursor[u]] = i
+            cursor[u] += 1
+
+    # Kahn, using the preallocated order list itself as the FIFO queue:
+    # order[head:tail] holds ready tasks that haven't been expanded yet
+    order = [0] * n
+    tail = 0
+    for i in range(n):
+        if indeg[i] == 0:
+            order[tail] = i
+            tail += 1
+    head = 0
+    while head < tail:
+        i = order[head]
+        head += 1
+        for m in out_indices[out_indptr[i]:out_indptr[i + 1]]:
             indeg[m] -= 1
             if indeg[m] == 0:
-                queue.append(m)
+                order[tail] = m
+                tail += 1
 
-    if len(order) != len(tasks):
+    if tail != n:
         raise ValueError("Cycle detected in precedence graph.")
-    return order, graph, name_to_task
+    return order, out_indptr, out_indices
 
 def cpm(tasks):
     # normalize fields
@@ -48,65 +112,153 @@ def cpm(tasks):
                 t["duration"] = 1
         t["immediatePredecessor"] = t.get("immediatePredecessor") or t.get("predecessors") or []
 
-    order, graph, name_to_task = topological_order(tasks)
+    order, out_indptr, out_indices = topological_order(tasks)
 
-    # forward pass
-    for name in order:
-        t = name_to_task[name]
-        preds = t.get("immediatePredecessor", []) or []
-        es = 0
-        for p in preds:
-            es = max(es, name_to_task[p]["EF"])
-        t["ES"] = es
-        t["EF"] = es + int(t["duration"])
+    # SoA layout: one flat int list per field, indexed like `tasks`
+    n = len(tasks)
+    dur = [int(t["duration"]) for t in tasks]
+    ES = [0] * n; EF = [0] * n; LS = [0] * n; LF = [0] * n
 
-    project_finish = max(name_to_task[n]["EF"] for n in name_to_task)
+    # forward pass: push each finish onto its successors (track project finish as we go)
+    project_finish = 0
+    for i in order:
+        ef = EF[i] = ES[i] + dur[i]
+        if ef > project_finish: project_finish = ef
+        for j in out_indices[out_indptr[i]:out_indptr[i + 1]]:
+            if ef > ES[j]: ES[j] = ef
 
     # reverse pass
-    rev = list(reversed(order))
-    succs = {n: [] for n in name_to_task}
-    for u, outs in graph.items():
-        for v in outs:
-            succs[u].append(v)
-
-    for name in rev:
-        t = name_to_task[name]
-        if not succs[name]:
+    for i in reversed(order):
+        lo, hi = out_indptr[i], out_indptr[i + 1]
+        if lo == hi:
             lf = project_finish
         else:
-            lf = min(name_to_task[s]["LS"] for s in succs[name])
-        t["LF"] = lf
-        t["LS"] = lf - int(t["duration"])
-        t["TF"] = t["LF"] - t["EF"]
+            lf = min(LS[j] for j in out_indices[lo:hi])
+        LF[i] = lf
+        LS[i] = lf - dur[i]
+
+    # write results back onto the task dicts for JSON serialization
+    for i, t in enumerate(tasks):
+        t["ES"] = ES[i]
+        t["EF"] = EF[i]
+        t["LF"] = LF[i]
+        t["LS"] = LS[i]
+        t["TF"] = LF[i] - EF[i]
         t["Critical"] = (t["TF"] == 0)
 
     return {
         "project_duration_days": project_finish,
-        "tasks": list(name_to_task.values()),
-        "critical_path_activities": [n for n in order if name_to_task[n]["Critical"]],
+        "tasks": tasks,
+        "critical_path_activities": [tasks[i]["activityName"] for i in order if tasks[i]["Critical"]],
     }
 
+# ---------- Helpers (pages) ----------
+# Pages without request-time variables are rendered once and served as bytes;
+# debug mode re-renders every time so template edits show up on reload.
+PAGE_CACHE: dict[str, bytes] = {}
+
+def _static_page(template):
+    body = PAGE_CACHE.get(template)
+    if body is None or app.debug:
+        body = PAGE_CACHE[template] = render_template(template).encode()
+    return Response(body, mimetype="text/html")
+
+# ---------- Helpers (STL -> GLB jobs) ----------
+# Conversions run on daemon threads. Job state lives on disk next to the GLB
+# (<uid>.json holds the latest progress message), so any gunicorn worker can
+# answer /progress and /convert/<uid>.glb. Files older than JOB_TTL are swept.
+CONVERT_DIR = os.path.join(tempfile.gettempdir(), "445-convert")
+JOB_TTL = 60 * 60  # seconds
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_MB", "256")) * 1024 * 1024
+
+# Bounded per-process pool: CONVERT_WORKERS jobs run at once, up to CONVERT_BACKLOG
+# more wait; beyond that uploads are refused with 429 rather than queued in memory
+CONVERT_WORKERS = int(os.environ.get("CONVERT_WORKERS", "1"))
+CONVERT_BACKLOG = int(os.environ.get("CONVERT_BACKLOG", "4"))
+CONVERT_POOL = ThreadPoolExecutor(max_workers=CONVERT_WORKERS, thread_name_prefix="convert")
+_CONVERT_SLOTS = threading.BoundedSemaphore(CONVERT_WORKERS + CONVERT_BACKLOG)
+
+def _job_path(uid, ext):
+    return os.path.join(CONVERT_DIR, f"{uid}{ext}")
+
+def _write_status(uid, msg):
+    # write-then-rename so readers never see a half-written status file
+    tmp = _job_path(uid, f".json.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(msg, fh)
+    os.replace(tmp, _job_path(uid, ".json"))
+
+def _read_status(uid):
+    try:
+        with open(_job_path(uid, ".json"), encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+def _sweep_jobs():
+    cutoff = time.time() - JOB_TTL
+    for entry in os.scandir(CONVERT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # removed concurrently by another worker
+
+CONVERT_DEPS_MSG = "STL conversion is not available: pip install trimesh numpy (optionally meshoptimizer)."
+
+def _convert_available():
+    # trimesh/numpy are an optional extra (not in requirements.txt); import
+    # lazily so page loads never pay for them
+    try:
+        import numpy, trimesh  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _run_convert(uid, src, dst, opts):
+    try:
+        try:
+            # imported lazily: convert.py calls sys.exit at import time without trimesh
+            import convert
+        except (ImportError, SystemExit):
+            _write_status(uid, {"stage": "error", "error": CONVERT_DEPS_MSG})
+            return
+        convert.convert(src, dst, progress=lambda stage, pct: _write_status(uid, {"stage": stage, "pct": pct}), **opts)
+        _write_status(uid, {"stage": "done", "pct": 100, "url": f"/convert/{os.path.basename(dst)}"})
+    except Exception as e:
+        _write_status(uid, {"stage": "error", "error": str(e) or type(e).__name__})
+    finally:
+        _CONVERT_SLOTS.release()
+        if os.path.exists(src):
+            os.remove(src)
+
 # ---------- Routes ----------
 @app.route("/")
 def home():
-    return render_template("home.html")
+    return _static_page("home.html")
     
 @app.route("/schedule")
 def homepage():
-    return render_template("schedule.html")
+    return _static_page("schedule.html")
 
 @app.route("/survey")
 def survey():
-    return render_template("survey.html")
+    return _static_page("survey.html")
 
 @app.route("/budget")
 def budger():
-    return render_template("budget.html")
+    return _static_page("budget.html")
 
 @app.route("/api/schedule.json")
 def schedule_json():
     # serve the editable JSON from /static so you can change it without touching Python
-    return send_from_directory("static", "schedule.json", mimetype="application/json")
+    try:
+        cache = _schedule_cache()
+    except FileNotFoundError:
+        abort(404)
+    resp = Response(cache["bytes"], mimetype="application/json")
+    resp.set_etag(cache["etag"])
+    return resp.make_conditional(request)
 
 @app.route("/viewer")
 def viewer():
@@ -116,11 +268,11 @@ def viewer():
 
 @app.route("/wdm")
 def wdm():
-    return render_template("wdm.html")
+    return _static_page("wdm.html")
 
 @app.route("/files")
 def files():
-    return render_template("drive.html")
+    return _static_page("drive.html")
 
 @app.route("/api/cpm", methods=["POST"])
 def api_cpm():
@@ -128,10 +280,87 @@ def api_cpm():
     tasks = data.get("tasks", [])
     try:
         result = cpm(tasks)
-        return jsonify(result)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _json({"error": str(e)}, 400)
+    return _json(result)
+
+@app.route("/convert", methods=["POST"])
+def convert_start():
+    # refuse before reading the upload body if the converter can't run here
+    if not _convert_available():
+        return _json({"error": CONVERT_DEPS_MSG}, 503)
+    upload = request.files.get("file")
+    if upload is None:
+        return _json({"error": "No STL file uploaded (form field 'file')."}, 400)
+    try:
+        opts = {
+            "z_up_to_y_up": request.form.get("z_up") in ("1", "true", "on"),
+            "scale": float(request.form.get("scale", 1.0)) * (0.001 if request.form.get("mm") in ("1", "true", "on") else 1.0),
+            "simplify": float(request.form.get("simplify", 1.0)),
+        }
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+    if not (0.0 < opts["simplify"] <= 1.0):
+        return _json({"error": "simplify must be in (0, 1]."}, 400)
+    if not math.isfinite(opts["scale"]) or opts["scale"] == 0:
+        return _json({"error": "scale must be a finite, non-zero number."}, 400)
+
+    if not _CONVERT_SLOTS.acquire(blocking=False):
+        return _json({"error": "Too many conversions in progress; try again later."}, 429)
+    try:
+        os.makedirs(CONVERT_DIR, exist_ok=True)
+        _sweep_jobs()
+        uid = uuid.uuid4().hex
+        src, dst = _job_path(uid, ".stl"), _job_path(uid, ".glb")
+        upload.save(src)
+        _write_status(uid, {"stage": "queued", "pct": 0})
+        CONVERT_POOL.submit(_run_convert, uid, src, dst, opts)
+    except BaseException:
+        # the slot is only handed to _run_convert once the job is submitted
+        _CONVERT_SLOTS.release()
+        raise
+    return _json({"job_id": uid}, 202)
+
+@app.route("/progress/<uid>")
+def convert_progress(uid):
+    if not uid.isalnum() or _read_status(uid) is None:
+        return _json({"error": f"Unknown job '{uid}'."}, 404)
+
+    def stream():
+        # poll the status file; it is shared by every worker process
+        last = None
+        deadline = time.monotonic() + JOB_TTL
+        while time.monotonic() < deadline:
+            raw = _read_status(uid)
+            if raw is None:
+                return  # swept
+            if raw != last:
+                last = raw
+                yield f"data: {raw}\n\n"
+                if json.loads(raw)["stage"] in ("done", "error"):
+                    return
+            time.sleep(0.25)
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.route("/convert/<uid>.glb")
+def convert_result(uid):
+    path = _job_path(uid, ".glb")
+    if not uid.isalnum() or not os.path.exists(path):
+        return _json({"error": f"No converted model for '{uid}'."}, 404)
+    return send_file(path, mimetype="model/gltf-binary")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8080"))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    if os.environ.get("FLASK_DEBUG") == "1":
+        # single-threaded dev server with the reloader/debugger
+        app.run(host="0.0.0.0", port=port, debug=True)
+    else:
+        # production: worker per core for CPU-bound /api/cpm, threads for static I/O
+        here = os.path.dirname(os.path.abspath(__file__))
+        argv = ["gunicorn", "--chdir", here, "-w", str(os.cpu_count() or 1),
+                "-k", "gthread", "--threads", "4", "-b", f"0.0.0.0:{port}", "app:app"]
+        try:
+            os.execvp(argv[0], argv)
+        except FileNotFoundError:
+            sys.exit("ERROR: pip install gunicorn (or set FLASK_DEBUG=1 for the dev server)")
@@ -8,7 +8,13 @@ except ImportError:
     print("ERROR: pip install trimesh numpy pygltflib", file=sys.stderr)
     sys.exit(1)
 
-# Optional simplifier (quadric error); pip install pyfqmr
+# Optional simplifiers (quadric error); pip install meshoptimizer (preferred) or pyfqmr
+try:
+    import meshoptimizer
+    HAS_MESHOPT = True
+except Exception:
+    HAS_MESHOPT = False
+
 try:
     from pyfqmr import FQMR
     HAS_FQMR = True
@@ -16,16 +22,19 @@ except Exception:
     HAS_FQMR = False
 
 
-def load_mesh(path: str) -> trimesh.Trimesh:
-    m = trimesh.load(path, force='mesh')
+def load_mesh(path: str, simplify: bool = False) -> trimesh.Trimesh:
+    # process=False skips trimesh's validation pass on load; vertices are welded below
+    m = trimesh.load_mesh(path, process=False)
     if isinstance(m, trimesh.Scene):
         m = trimesh.util.concatenate(tuple(
             g for g in m.dump().geometry.values() if isinstance(g, trimesh.Trimesh)
         ))
     if not isinstance(m, trimesh.Trimesh):
         raise ValueError("Could not load a triangle mesh from file.")
-    # Ensure triangles
-    if not m.is_watertight:
+    # STL is unindexed triangle soup: weld shared vertices (cheap hash pass) so the
+    # GLB stays compact and vertex normals shade smoothly
+    m.merge_vertices()
+    if simplify:
         m.remove_unreferenced_vertices()
     if m.vertices.shape[0] == 0 or m.faces.shape[0] == 0:
         raise ValueError("Empty mesh after load.")
@@ -33,25 +42,24 @@ def load_mesh(path: str) -> trimesh.Trimesh:
 
 
 def transform_mesh(mesh: trimesh.Trimesh, z_up_to_y_up: bool, scale: float):
-    # Build transform matrix
-    T = np.eye(4)
-
-    # Scale (mm->m = 0.001, etc.)
-    S = np.diag([scale, scale, scale, 1.0])
-    T = S @ T
+    # Only rotation + uniform scale here, so a single matmul over the
+    # vertex buffer replaces the full 4x4 apply_transform path
+    R = np.eye(3)
 
     # Z-up (CAD) to Y-up (three.js): rotate -90° about X
     if z_up_to_y_up:
         rx = -math.pi / 2.0
         R = np.array([
-            [1, 0,          0,         0],
-            [0, math.cos(rx), -math.sin(rx), 0],
-            [0, math.sin(rx),  math.cos(rx), 0],
-            [0, 0,          0,         1],
+            [1, 0,            0],
+            [0, math.cos(rx), -math.sin(rx)],
+            [0, math.sin(rx),  math.cos(rx)],
         ])
-        T = R @ T
 
-    mesh.apply_transform(T)
+    # Scale (mm->m = 0.001, etc.)
+    mesh.vertices = (mesh.vertices @ R.T) * scale
+    # A mirroring scale flips the winding; keep faces pointing outward
+    if scale < 0:
+        mesh.invert()
 
 
 def simplify_mesh(mesh: trimesh.Trimesh, target_ratio: float) -> trimesh.Trimesh:
@@ -59,34 +67,80 @@ def simplify_mesh(mesh: trimesh.Trimesh, target_ratio: float) -> trimesh.Trimesh
     target_ratio = max(0.01, min(1.0, target_ratio))
     target_count = int(mesh.faces.shape[0] * target_ratio)
 
-    if not HAS_FQMR:
-        print("NOTE: pyfqmr not installed; skipping simplification.", file=sys.stderr)
+    if not (HAS_MESHOPT or HAS_FQMR):
+        print("NOTE: meshoptimizer/pyfqmr not installed; skipping simplification.", file=sys.stderr)
         return mesh
 
     print(f"Simplifying faces: {mesh.faces.shape[0]} -> ~{target_count} ...", file=sys.stderr)
-    fqmr = FQMR()
-    fqmr.setMesh(mesh.vertices.astype(np.float64), mesh.faces.astype(np.int32))
-    # Quality settings — tweak if needed
-    fqmr.simplify(target_count, aggressiveness=7, preserveBorder=True, verbose=False)
-    v, f = fqmr.getMesh()
+    if HAS_MESHOPT:
+        # float32 positions are all GLB stores anyway; output indexes the input vertices
+        indices = mesh.faces.astype(np.uint32).ravel()
+        dest = np.empty_like(indices)
+        count = meshoptimizer.simplify(dest, indices, mesh.vertices.astype(np.float32),
+                                       target_index_count=target_count * 3, target_error=0.01)
+        v, f = mesh.vertices, dest[:count].reshape(-1, 3)
+    else:
+        fqmr = FQMR()
+        fqmr.setMesh(mesh.vertices.astype(np.float64), mesh.faces.astype(np.int32))
+        # Quality settings — tweak if needed
+        fqmr.simplify(target_count, aggressiveness=7, preserveBorder=True, verbose=False)
+        v, f = fqmr.getMesh()
     if v.shape[0] and f.shape[0]:
-        out = trimesh.Trimesh(vertices=v, faces=f, process=True)
+        # Both simplifiers emit indexed meshes over already-welded vertices,
+        # so skip trimesh's merge/validate pass and just drop unused vertices
+        out = trimesh.Trimesh(vertices=v, faces=f, process=False)
         out.remove_unreferenced_vertices()
         return out
     print("Simplification failed; using original mesh.", file=sys.stderr)
     return mesh
 
 
+def mesh_normals(mesh: trimesh.Trimesh):
+    # Unit face and vertex normals in one vectorized pass: vertex normals are the
+    # area-weighted sum of adjacent face normals; degenerate faces/vertices get zeros
+    v, f = mesh.vertices, mesh.faces
+    fn = np.cross(v[f[:, 1]] - v[f[:, 0]], v[f[:, 2]] - v[f[:, 0]])
+    vn = np.zeros_like(v)
+    for k in range(3):
+        np.add.at(vn, f[:, k], fn)
+    for n in (fn, vn):
+        norm = np.linalg.norm(n, axis=1, keepdims=True)
+        np.divide(n, norm, out=n, where=norm > 0)
+    return fn, vn
+
+
 def export_glb(mesh: trimesh.Trimesh, out_path: str):
     # Center to make it nice for viewers
     mesh.remove_unreferenced_vertices()
     mesh.vertices -= mesh.bounding_box.centroid
+    # Seed the normals cache so the exporter doesn't recompute them
+    mesh.face_normals, mesh.vertex_normals = mesh_normals(mesh)
     # Export GLB
     glb_bytes = trimesh.exchange.gltf.export_glb(mesh, include_normals=True)
     with open(out_path, "wb") as f:
         f.write(glb_bytes)
 
 
+def convert(src: str, dst: str, z_up_to_y_up: bool = False, scale: float = 1.0,
+            simplify: float = 1.0, progress=None):
+    # progress(stage, pct) is called between pipeline steps (used by the web job queue)
+    report = progress or (lambda stage, pct: None)
+
+    report("load", 5)
+    mesh = load_mesh(src, simplify=simplify < 1.0)
+
+    report("transform", 30)
+    transform_mesh(mesh, z_up_to_y_up=z_up_to_y_up, scale=scale)
+
+    # Optional simplify
+    if simplify < 1.0:
+        report("simplify", 45)
+        mesh = simplify_mesh(mesh, target_ratio=simplify)
+
+    report("export", 80)
+    export_glb(mesh, dst)
+
+
 def pretty_size(n):
     for unit in ['B','KB','MB','GB']:
         if n < 1024.0:
@@ -103,7 +157,7 @@ def main():
     ap.add_argument("--scale", type=float, default=1.0, help="uniform scale factor (applied after --mm)")
     ap.add_argument("--z-up", action="store_true", help="rotate -90° about X (Z-up to Y-up)")
     ap.add_argument("--simplify", type=float, default=1.0,
-                    help="target face ratio (0.05=5%% of faces). Requires pyfqmr. Default: 1.0 (no simplify)")
+                    help="target face ratio (0.05=5%% of faces). Requires meshoptimizer or pyfqmr. Default: 1.0 (no simplify)")
     args = ap.parse_args()
 
     src = args.input
@@ -115,17 +169,9 @@ def main():
     before = os.path.getsize(src)
     print(f"Input: {src} ({pretty_size(before)})", file=sys.stderr)
 
-    mesh = load_mesh(src)
-
     # Scaling chain
     scale = args.scale * (0.001 if args.mm else 1.0)
-    transform_mesh(mesh, z_up_to_y_up=args.z_up, scale=scale)
-
-    # Optional simplify
-    if args.simplify < 1.0:
-        mesh = simplify_mesh(mesh, target_ratio=args.simplify)
-
-    export_glb(mesh, dst)
+    convert(src, dst, z_up_to_y_up=args.z_up, scale=scale, simplify=args.simplify)
 
     after = os.path.getsize(dst)
     print(f"Output: {dst} ({pretty_size(after)})", file=sys.stderr)
@@ -3,15 +3,21 @@
 # Parse "BRIDGEWORKS COLLECTIVE-Project-Schedule.xlsx" => schedule.json
 
 from __future__ import annotations
-import argparse, json, re
+import argparse, json, math, re
+from contextlib import suppress
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, date
+from functools import lru_cache
 from openpyxl import load_workbook
 
 # --------- Helpers ---------
 
 CURRENCY_RE = re.compile(r"[^\d\.\-]")
+_BUDGET_STRIP = str.maketrans("", "", "$, \t\n")
+_MMDD_RE = re.compile(r"^\s*(\d{1,2})\s*[/-]\s*(\d{1,2})(?:\s*[/-]\s*(\d{2,4}))?\s*$")
+_MONTH_FIRST_FMTS = ("%b %d, %Y", "%B %d, %Y")
+_DAY_FIRST_FMTS = ("%d %b %Y", "%d %B %Y")
 
 def to_str(x: Any) -> str:
     if x is None: return ""
@@ -20,7 +26,13 @@ def to_str(x: Any) -> str:
 def clean_budget(x: Any) -> Optional[float]:
     s = to_str(x)
     if not s: return None
-    s = CURRENCY_RE.sub("", s)  # remove $, commas, spaces
+    # Fast path: strip $, commas, whitespace via translate table
+    try:
+        v = float(s.translate(_BUDGET_STRIP))
+        if math.isfinite(v): return v
+    except ValueError:
+        pass
+    s = CURRENCY_RE.sub("", s)  # slow path: drop anything but digits, '.', '-'
     if s == "": return None
     try:
         return float(s)
@@ -56,40 +68,46 @@ def parse_date_maybe_year(x: Any) -> Optional[str]:
         return iso_date(x)
     s = to_str(x)
     if not s: return None
+    return _parse_str_date(s)
+
+@lru_cache(maxsize=2048)
+def _parse_str_date(s: str) -> Optional[str]:
+    # Sheets repeat the same few date strings, so memoize the string path.
+    # Dispatch on the leading character so failed strptime attempts (and their
+    # exceptions) are only paid for formats the string could actually match.
+    if s[0].isdigit():
+        # MM/DD[/YYYY] patterns
+        m = _MMDD_RE.match(s)
+        if m:
+            mm = int(m.group(1))
+            dd = int(m.group(2))
+            if m.group(3):
+                yy = int(m.group(3))
+                if yy < 100: yy += 2000
+            else:
+                yy = infer_year_for_mmdd(mm, dd)
+            try:
+                return date(yy, mm, dd).isoformat()
+            except Exception:
+                return None
+
+        # ISO 'YYYY-MM-DD'
+        with suppress(ValueError):
+            return datetime.fromisoformat(s).date().isoformat()
+        return _try_formats(s, _DAY_FIRST_FMTS)
+
+    if s[0].isalpha():
+        # e.g. "Friday, September 12, 2025", "Fri, Sep 12, 2025"
+        if s.count(",") == 2:
+            return _try_formats(s, ("%A, %B %d, %Y",))
+        return _try_formats(s, _MONTH_FIRST_FMTS)
 
-    # Try easy ISO first
-    try:
-        return datetime.fromisoformat(s).date().isoformat()
-    except Exception:
-        pass
+    return None
 
-    # Try MM/DD[/YYYY] patterns
-    m = re.match(r"^\s*(\d{1,2})\s*[/-]\s*(\d{1,2})(?:\s*[/-]\s*(\d{2,4}))?\s*$", s)
-    if m:
-        mm = int(m.group(1))
-        dd = int(m.group(2))
-        if m.group(3):
-            yy = int(m.group(3))
-            if yy < 100: yy += 2000
-        else:
-            yy = infer_year_for_mmdd(mm, dd)
-        try:
-            return date(yy, mm, dd).isoformat()
-        except Exception:
-            return None
-
-    # Try very loose parse like "Friday, September 12, 2025"
-    try:
-        # Supports e.g. "September 12, 2025", "Fri, Sep 12, 2025"
-        return datetime.strptime(s, "%A, %B %d, %Y").date().isoformat()
-    except Exception:
-        pass
-    for fmt in ("%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y"):
-        try:
+def _try_formats(s: str, fmts: Tuple[str, ...]) -> Optional[str]:
+    for fmt in fmts:
+        with suppress(ValueError):
             return datetime.strptime(s, fmt).date().isoformat()
-        except Exception:
-            continue
-
     return None
 
 def squash_newlines(s: str) -> str:
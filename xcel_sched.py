@@ -3,15 +3,30 @@
 # Parse "BRIDGEWORKS COLLECTIVE-Project-Schedule.xlsx" => schedule.json
 
 from __future__ import annotations
-import argparse, json, re
+import argparse, json, math, re
+from contextlib import suppress
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, date
+from functools import lru_cache
+from operator import itemgetter
 from openpyxl import load_workbook
 
 # --------- Helpers ---------
 
 CURRENCY_RE = re.compile(r"[^\d\.\-]")
+_BUDGET_STRIP = str.maketrans("", "", "$, \t\n")
+_MMDD_RE = re.compile(r"^\s*(\d{1,2})\s*[/-]\s*(\d{1,2})(?:\s*[/-]\s*(\d{2,4}))?\s*$")
+_MONTH_FIRST_FMTS = ("%b %d, %Y", "%B %d, %Y")
+_DAY_FIRST_FMTS = ("%d %b %Y", "%d %B %Y")
+
+# Metadata labels scanned for in the top of the schedule sheet
+META_LABELS = {
+    "PROJECT NAME": "name",
+    "PROJECT MANAGER": "manager",
+    "START DATE": "start",
+    "END DATE": "end",
+}
 
 def to_str(x: Any) -> str:
     if x is None: return ""
@@ -20,7 +35,13 @@ def to_str(x: Any) -> str:
 def clean_budget(x: Any) -> Optional[float]:
     s = to_str(x)
     if not s: return None
-    s = CURRENCY_RE.sub("", s)  # remove $, commas, spaces
+    # Fast path: strip $, commas, whitespace via translate table
+    try:
+        v = float(s.translate(_BUDGET_STRIP))
+        if math.isfinite(v): return v
+    except ValueError:
+        pass
+    s = CURRENCY_RE.sub("", s)  # slow path: drop anything but digits, '.', '-'
     if s == "": return None
     try:
         return float(s)
@@ -56,42 +77,48 @@ def parse_date_maybe_year(x: Any) -> Optional[str]:
         return iso_date(x)
     s = to_str(x)
     if not s: return None
+    return _parse_str_date(s)
+
+@lru_cache(maxsize=2048)
+def _parse_str_date(s: str) -> Optional[str]:
+    # Sheets repeat the same few date strings, so memoize the string path.
+    # Dispatch on the leading character so failed strptime attempts (and their
+    # exceptions) are only paid for formats the string could actually match.
+    if s[0].isdigit():
+        # MM/DD[/YYYY] patterns
+        m = _MMDD_RE.match(s)
+        if m:
+            mm = int(m.group(1))
+            dd = int(m.group(2))
+            if m.group(3):
+                yy = int(m.group(3))
+                if yy < 100: yy += 2000
+            else:
+                yy = infer_year_for_mmdd(mm, dd)
+            try:
+                return date(yy, mm, dd).isoformat()
+            except Exception:
+                return None
 
-    # Try easy ISO first
-    try:
-        return datetime.fromisoformat(s).date().isoformat()
-    except Exception:
-        pass
+        # ISO 'YYYY-MM-DD'
+        with suppress(ValueError):
+            return datetime.fromisoformat(s).date().isoformat()
+        return _try_formats(s, _DAY_FIRST_FMTS)
 
-    # Try MM/DD[/YYYY] patterns
-    m = re.match(r"^\s*(\d{1,2})\s*[/-]\s*(\d{1,2})(?:\s*[/-]\s*(\d{2,4}))?\s*$", s)
-    if m:
-        mm = int(m.group(1))
-        dd = int(m.group(2))
-        if m.group(3):
-            yy = int(m.group(3))
-            if yy < 100: yy += 2000
-        else:
-            yy = infer_year_for_mmdd(mm, dd)
-        try:
-            return date(yy, mm, dd).isoformat()
-        except Exception:
-            return None
-
-    # Try very loose parse like "Friday, September 12, 2025"
-    try:
-        # Supports e.g. "September 12, 2025", "Fri, Sep 12, 2025"
-        return datetime.strptime(s, "%A, %B %d, %Y").date().isoformat()
-    except Exception:
-        pass
-    for fmt in ("%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y"):
-        try:
-            return datetime.strptime(s, fmt).date().isoformat()
-        except Exception:
-            continue
+    if s[0].isalpha():
+        # e.g. "Friday, September 12, 2025", "Fri, Sep 12, 2025"
+        if s.count(",") == 2:
+            return _try_formats(s, ("%A, %B %d, %Y",))
+        return _try_formats(s, _MONTH_FIRST_FMTS)
 
     return None
 
+def _try_formats(s: str, fmts: Tuple[str, ...]) -> Optional[str]:
+    for fmt in fmts:
+        with suppress(ValueError):
+            return datetime.strptime(s, fmt).date().isoformat()
+    return None
+
 def squash_newlines(s: str) -> str:
     return re.sub(r"\s+", " ", s).strip()
 
@@ -110,68 +137,57 @@ def parse_project_schedule_sheet(ws) -> Dict[str, Any]:
       H: Resources
     We'll detect the header row by looking for the literal 'Timeline' + 'Start Date' etc nearby.
     """
-    # Scan entire sheet to collect meta and detect header row
-    project_name = None
-    project_manager = None
-    project_start_label_row = None
-    project_end_label_row = None
+    # Materialize the sheet once as raw values; everything below indexes this
+    rows: List[Tuple[Any, ...]] = list(ws.iter_rows(values_only=True))
+
+    # Scan sheet to collect meta label cells (1-based row, col) and detect header row
+    meta: Dict[str, Tuple[int, int]] = {}
     header_row_idx: Optional[int] = None
 
-    # Find metadata and header
-    for r in ws.iter_rows():
-        for c in r:
-            val = to_str(c.value)
+    # Find metadata and header; stop once every label has been seen
+    for r, row in enumerate(rows, start=1):
+        for c, v in enumerate(row, start=1):
+            val = to_str(v)
             if not val:
                 continue
-            u = val.upper()
-
-            if "PROJECT NAME" in u and not project_name:
-                # The actual name likely to the right or below
-                # try same row, next non-empty cell
-                project_name = find_neighbor_value(ws, c, prefer_row=True)
 
-            if "PROJECT MANAGER" in u and not project_manager:
-                project_manager = find_neighbor_value(ws, c, prefer_row=True)
-
-            if val.strip() == "Timeline":
+            if val == "Timeline" and header_row_idx is None:
                 # Likely header is on this row with more fields (Start Date, End Date, etc.) or the next row.
-                header_row_idx = c.row
-
-            if "START DATE" in u:
-                project_start_label_row = c.row
-            if "END DATE" in u:
-                project_end_label_row = c.row
-
-    # Determine project-level start/end from labeled rows (neighbor cell to right),
-    # otherwise compute from tasks later.
-    project_start = None
-    project_end = None
-    if project_start_label_row:
-        for cell in ws[project_start_label_row]:
-            if "START DATE" in to_str(cell.value).upper():
-                project_start = parse_date_maybe_year(find_neighbor_value(ws, cell, prefer_row=True))
-                break
-    if project_end_label_row:
-        for cell in ws[project_end_label_row]:
-            if "END DATE" in to_str(cell.value).upper():
-                project_end = parse_date_maybe_year(find_neighbor_value(ws, cell, prefer_row=True))
-                break
+                header_row_idx = r
+                continue
+
+            u = val.upper()
+            for kw, key in META_LABELS.items():
+                if kw in u:
+                    meta.setdefault(key, (r, c))
+                    break
+        if header_row_idx is not None and len(meta) == len(META_LABELS):
+            break
+
+    # The actual values sit in the next non-empty cell to the right of each label;
+    # project start/end fall back to the task dates later.
+    def meta_value(key: str) -> Any:
+        return find_neighbor_value(rows, *meta[key], prefer_row=True) if key in meta else None
+
+    project_name = meta_value("name")
+    project_manager = meta_value("manager")
+    project_start = parse_date_maybe_year(meta_value("start"))
+    project_end = parse_date_maybe_year(meta_value("end"))
 
     # If header_row_idx not found, try to guess: find row that contains "Start Date" and "End Date"
     if header_row_idx is None:
-        for r in ws.iter_rows():
-            texts = [to_str(c.value).lower() for c in r if to_str(c.value)]
+        for r, row in enumerate(rows, start=1):
+            texts = [to_str(v).lower() for v in row if to_str(v)]
             if ("start date" in texts) and ("end date" in texts):
-                header_row_idx = r[0].row
+                header_row_idx = r
                 break
 
     # Fallback if still None
     if header_row_idx is None:
         # Heuristic: use first row where column A looks like a phase label and column B has text
-        for r in ws.iter_rows(min_row=1, max_col=2):
-            a, b = r[0], r[1]
-            if to_str(a.value) and to_str(b.value):
-                header_row_idx = r[0].row
+        for r in range(1, len(rows) + 1):
+            if to_str(cell_value(rows, r, 1)) and to_str(cell_value(rows, r, 2)):
+                header_row_idx = r
                 break
 
     # Now parse table rows under header
@@ -182,9 +198,8 @@ def parse_project_schedule_sheet(ws) -> Dict[str, Any]:
     # Default to A..H if not detected
     col_idx = {"phase": 1, "task": 2, "start": 3, "end": 4, "duration": 5, "schedule": 6, "budget": 7, "resources": 8}
     if header_row_idx is not None:
-        header_cells = list(ws[header_row_idx])
-        for j, cell in enumerate(header_cells, start=1):
-            txt = to_str(cell.value).lower()
+        for j, v in enumerate(rows[header_row_idx - 1], start=1):
+            txt = to_str(v).lower()
             if "start" in txt and "date" in txt: col_idx["start"] = j
             elif ("end" in txt and "date" in txt) or "finish" in txt: col_idx["end"] = j
             elif "duration" in txt: col_idx["duration"] = j
@@ -195,21 +210,17 @@ def parse_project_schedule_sheet(ws) -> Dict[str, Any]:
             elif "main" in txt or "phase" in txt: col_idx["phase"] = j
 
     start_row = (header_row_idx or 1) + 1
-    last_row = ws.max_row
-
-    for r in range(start_row, last_row + 1):
-        # Access by 1-based column index
-        def val(ci: int) -> Any:
-            return ws.cell(r, ci).value if 1 <= ci <= ws.max_column else None
-
-        a = val(col_idx["phase"])
-        b = val(col_idx["task"])
-        c = val(col_idx["start"])
-        d = val(col_idx["end"])
-        e = val(col_idx["duration"])
-        f = val(col_idx["schedule"])
-        g = val(col_idx["budget"])
-        h = val(col_idx["resources"])
+
+    # Pull all eight fields out of each row tuple in one C-level call;
+    # short rows are padded so every column index is in range
+    fields = ("phase", "task", "start", "end", "duration", "schedule", "budget", "resources")
+    pick = itemgetter(*(col_idx[k] - 1 for k in fields))
+    width = max(col_idx.values())
+
+    for row in rows[start_row - 1:]:
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        a, b, c, d, e, f, g, h = pick(row)
 
         # Detect phase rows (main phase in col A; task is empty)
         if to_str(a) and not to_str(b):
@@ -254,9 +265,9 @@ def parse_project_schedule_sheet(ws) -> Dict[str, Any]:
 
     # If project_name/manager missing, try to infer from top-left cells
     if not project_name:
-        project_name = guess_near(ws, "Project Name")
+        project_name = guess_near(rows, "Project Name")
     if not project_manager:
-        project_manager = guess_near(ws, "Project Manager")
+        project_manager = guess_near(rows, "Project Manager")
 
     # Derive project start/end if not captured
     if not project_start or not project_end:
@@ -273,37 +284,41 @@ def parse_project_schedule_sheet(ws) -> Dict[str, Any]:
         "tasks": tasks
     }
 
-def find_neighbor_value(ws, cell, prefer_row=True) -> Any:
+def cell_value(rows: List[Tuple[Any, ...]], r: int, c: int) -> Any:
+    """Value at 1-based (row, col) in the materialized sheet, None if out of range."""
+    if 1 <= r <= len(rows):
+        row = rows[r - 1]
+        if 1 <= c <= len(row):
+            return row[c - 1]
+    return None
+
+def find_neighbor_value(rows: List[Tuple[Any, ...]], r: int, c: int, prefer_row=True) -> Any:
     """Find next non-empty neighbor to the right (prefer_row=True) else below."""
     if prefer_row:
-        col = cell.column + 1
-        while col <= ws.max_column:
-            v = ws.cell(cell.row, col).value
+        for v in rows[r - 1][c:]:
             if to_str(v):
                 return v
-            col += 1
     else:
-        row = cell.row + 1
-        while row <= ws.max_row:
-            v = ws.cell(row, cell.column).value
+        for row in rows[r:]:
+            v = row[c - 1] if c <= len(row) else None
             if to_str(v):
                 return v
-            row += 1
     return None
 
-def guess_near(ws, label: str) -> Optional[str]:
+def guess_near(rows: List[Tuple[Any, ...]], label: str) -> Optional[str]:
     L = label.upper()
-    for r in ws.iter_rows():
-        for c in r:
-            if L in to_str(c.value).upper():
-                v = find_neighbor_value(ws, c, prefer_row=True)
+    for r, row in enumerate(rows, start=1):
+        for c, v in enumerate(row, start=1):
+            if L in to_str(v).upper():
+                v = find_neighbor_value(rows, r, c, prefer_row=True)
                 return to_str(v) if v else None
     return None
 
 # --------- Entry ---------
 
 def convert_excel_to_json(in_path: Path, out_path: Path, sheet_name: str = "PROJECT SCHEDULE ") -> None:
-    wb = load_workbook(in_path, data_only=True)
+    # read_only streams the XML without building Cell/Style objects
+    wb = load_workbook(in_path, data_only=True, read_only=True)
     if sheet_name not in wb.sheetnames:
         # fallback: find first sheet containing "SCHEDULE"
         candidates = [s for s in wb.sheetnames if "SCHEDULE" in s.upper()]
@@ -311,7 +326,13 @@ def convert_excel_to_json(in_path: Path, out_path: Path, sheet_name: str = "PROJ
             raise ValueError(f"Could not find a schedule sheet in: {wb.sheetnames}")
         sheet_name = candidates[0]
     ws = wb[sheet_name]
-    payload = parse_project_schedule_sheet(ws)
+    # read_only trusts the stored <dimension> tag, which non-Excel writers often
+    # get wrong; drop it so iter_rows reads every row/column actually present
+    ws.reset_dimensions()
+    try:
+        payload = parse_project_schedule_sheet(ws)
+    finally:
+        wb.close()
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     print(f"Wrote {out_path} with {len(payload.get('tasks', []))} tasks")